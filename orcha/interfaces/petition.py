@@ -79,6 +79,14 @@ class Petition(ABC):
         the ID (for equality/inequality tests) and the priority (for comparison
         tests).
 
+    .. versionchanged:: 0.1.12
+        When :attr:`action_executor <orcha.properties.action_executor>` is ``"process"``,
+        petitions are sent to another process for running their :attr:`action`, so they
+        must be picklable: the :attr:`action` itself (i.e.: it cannot be a lambda or a
+        nested function), the :attr:`queue` (a proxy object) and any other field defined
+        by your subclass. The :attr:`condition` is only evaluated by the processor and is
+        never sent, so it can be any callable.
+
     :see: :py:func:`field <dataclasses.field>`
     """
 
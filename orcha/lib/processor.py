@@ -23,14 +23,17 @@
 The class :class:`Processor` is responsible for handing queues, objects and petitions.
 Alongside with :class:`Manager <orcha.lib.Manager>`, it's the heart of the orchestrator.
 """
+import copy
+import heapq
 import multiprocessing
-import random
+import os
 import signal
 import subprocess
-from queue import PriorityQueue, Queue
-from threading import Event, Lock, Thread
-from time import sleep
-from typing import Dict, List, Optional, Union
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from threading import BoundedSemaphore, Condition, Event, Lock, Thread
+from typing import Dict, List, Optional, Set, Union
 
 import systemd.daemon as systemd
 
@@ -42,6 +45,24 @@ from orcha.utils.logging_utils import get_logger
 
 log = get_logger()
 
+# queue in which the action pool processes report the PIDs of the running petitions
+_pid_queue: Optional[multiprocessing.Queue] = None
+
+
+def _init_action_worker(pid_queue: multiprocessing.Queue, authkey: Optional[bytes]):
+    global _pid_queue
+    _pid_queue = pid_queue
+    if authkey is not None:
+        multiprocessing.current_process().authkey = authkey
+
+
+def _run_action(p: Petition):
+    def assign_pid(proc: Union[subprocess.Popen, int]):
+        pid = proc if isinstance(proc, int) else proc.pid
+        _pid_queue.put((p.id, pid))
+
+    p.action(assign_pid, p)
+
 
 class Processor:
     """
@@ -70,17 +91,22 @@ class Processor:
          |                      ┌─────────────────────────┐             ║ o         ║
          |              ╔═══════  Internal petition queue  ◄═══════╦════╝ n         ║
          |              ║       └─────────────────────────┘        ║                ║
-         |              ║           ┌─────────────────────────┐    ║                ║
-         |              ║        ╔══   Internal signal queue   ◄═══║════════════════╝
-         |              ║        ║  └─────────────────────────┘    ║
-         |              ║        ║                                 ║      not
-         |              ▼        ╚══════╗                          ║ p.condition(p)
-         | ╔══════════════════════════╗ ║       ╔══════════════════╩═════╗
-         ├►║ Internal petition thread ╠═║══════►║ Petition launch thread ║
-         | ╚══════════════════════════╝ ▼       ╚══════════════════╤═════╝
-         |       ╔════════════════════════╗                 ▲      |  ┌─────────────────────┐
-         └──────►║ Internal signal thread ╠═════════════════╝      ├─►| manager.on_start(p) |
-                 ╚════════════════════════╝   send SIGTERM         |  └─────────────────────┘
+         |              ║                                          ║                ║
+         |              ║                           p.condition(p) ║                ║
+         |              ║                               ╔══════════╩══════════╗     ║
+         |              ║                               ║ Waiting list thread ║     ║
+         |              ║                               ╚══════════▲══════════╝     ║
+         |              ║                                   ┌──────╨───────┐        ║
+         |              ║                                   | Waiting list |        ║
+         |              ║                                   └──────▲───────┘        ║
+         |              ║                                          ║      not       ║
+         |              ▼                                          ║ p.condition(p) ║
+         | ╔══════════════════════════╗         ╔══════════════════╩═════╗          ║
+         └►║ Internal petition thread ╠════════►║ Petition launch thread ║◄═════════╝
+           ╚══════════════════════════╝         ╚══════════════════╤═════╝  send SIGINT
+                                                                   |  ┌─────────────────────┐
+                                                                   ├─►| manager.on_start(p) |
+                                                                   |  └─────────────────────┘
                                                                    |   ┌─────────────────┐
                                                                    ├──►| p.action(fn, p) |
                                                                    |   └─────────────────┘
@@ -99,7 +125,7 @@ class Processor:
 
     1. **Queues**
 
-    The point of having four :py:class:`queues <queue.Queue>` is that messages are travelling
+    The point of having three :py:class:`queues <queue.Queue>` is that messages are travelling
     across threads in a safe way. When a message is received from another process, there is
     some "black magic" going underneath the
     :py:class:`BaseManager <multiprocessing.managers.BaseManager>` class involving pipes, queues
@@ -120,17 +146,18 @@ class Processor:
     or deletions won't be propagated to the rest of the processes as it is a local-only
     object.
 
-    For that reason, there is four queues: two of them have the mission of receiving
+    For that reason, there is three queues: two of them have the mission of receiving
     the requests from other processes and once the request is received by us and is
     available on our process, it is then added to an internal priority queue by the
     handler threads (allowing, for example, sorting of the petitions based on their
-    priority, which wouldn't be possible on a proxied queue).
+    priority, which wouldn't be possible on a proxied queue). Signals are not sorted
+    at all, so they are handled directly by the thread listening on the signal queue.
 
     2. **Threads**
 
     As you may notice, there is almost two threads per queue: one is a **producer** and
     the other one is the **consumer** (following the producer/consumer model). The need
-    of so much threads (5 at the time this is being written) is **to not to block** any
+    of so much threads (4 at the time this is being written) is **to not to block** any
     processes and leave the orchestrator free of load.
 
     As the queues are synchronous, which means that the thread is forced to wait until
@@ -138,16 +165,22 @@ class Processor:
     will pause the entire main thread until all queues are unlocked sequentially, one after
     each other, preventing any other request to arrive and being processed.
 
-    That's the reason why there are two threads just listening to proxied queues and placing
-    the requests on another queue. In addition, the execution of the action is also run
-    asynchronously in order to not to block the main thread during the processing (this
-    also applies to the evaluation of the :attr:`condition <orcha.interfaces.Petition.condition>`
-    predicate).
+    That's the reason why there are two threads just listening to proxied queues: one
+    places the requests on another queue and the other one sends the signals right away.
+    In addition, the execution of the action is also run asynchronously in order to not to
+    block the main thread during the processing (this also applies to the evaluation of the
+    :attr:`condition <orcha.interfaces.Petition.condition>` predicate).
+
+    When the :attr:`condition <orcha.interfaces.Petition.condition>` of a petition is not
+    satisfied, the petition is moved to a waiting list instead of being enqueued again. Another
+    thread re-evaluates the waiting petitions whenever a running one finishes (or periodically,
+    as conditions may depend on external resources) and re-adds those which can now be run.
 
-    Each time a new thread is spawned for a :class:`Petition`, it is saved on a list of
-    currently running threads. There is another thread running from the start of the
-    :class:`Process` which is the **garbage collector**, whose responsibility is to
-    check which threads on that list have finished and remove them when that happens.
+    Petitions are run on a :py:class:`thread pool <concurrent.futures.ThreadPoolExecutor>`
+    whose size is defined by :attr:`max_concurrent <orcha.properties.max_concurrent>`, so
+    threads are reused across petitions and no more than that amount of petitions are
+    running at the same time. Any other petition stays in the internal queue until there is
+    a free thread, so the one with the highest priority is always the next to run.
 
     Warning:
         When defining your own :attr:`action <orcha.interfaces.Petition.action>`, take special
@@ -178,6 +211,14 @@ class Processor:
         that defines if the processor shall create a background thread that takes care of
         notifying systemd about our status and, if dead, to restart us.
 
+    .. versionadded:: 0.1.12
+        Actions can be run on a pool of processes instead of threads by setting
+        :attr:`action_executor <orcha.properties.action_executor>` to ``"process"``, so
+        CPU-bound actions are not limited by the GIL. Petitions must be picklable then.
+        Worker processes are started with the ``forkserver`` method and, if any of them dies
+        abruptly, the petition it was running is finished with an error and the pool is
+        restarted.
+
     Args:
         queue (multiprocessing.Queue, optional): queue in which new :class:`Message` s are
                                                  expected to be. Defaults to :obj:`None`.
@@ -197,7 +238,8 @@ class Processor:
             will be restarted.
 
     Raises:
-        ValueError: when no arguments are given and the processor has not been initialized yet.
+        ValueError: when no arguments are given and the processor has not been initialized yet,
+            or when :attr:`action_executor <orcha.properties.action_executor>` is not valid.
     """
 
     __instance__ = None
@@ -221,44 +263,61 @@ class Processor:
             if not all((queue, finishq, manager)):
                 raise ValueError("queue & manager objects cannot be empty during init")
 
-            self.lock = Lock()
+            if properties.action_executor not in ("thread", "process"):
+                raise ValueError(f'unknown action executor "{properties.action_executor}"')
+
             self.queue = queue
             self.finishq = finishq
             self.manager = manager
             self.look_ahead = look_ahead
-            self.running = True
+            self._stop = Event()
             self.notify_watchdog = notify_watchdog
 
-            self._internalq = PriorityQueue()
-            self._signals = Queue()
-            self._threads: List[Thread] = []
+            self._internalq_heap: List[Petition] = []
+            self._internalq_lock = Lock()
+            self._internalq_cv = Condition(self._internalq_lock)
+            max_workers = properties.max_concurrent or 32
+            self._pool = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="orcha-petition"
+            )
+            self._slots = BoundedSemaphore(max_workers)
             self._petitions: Dict[int, int] = {}
-            self._gc_event = Event()
             self._pred_lock = Lock()
-            self._process_t = Thread(target=self._process)
-            self._internal_t = Thread(target=self._internal_process)
-            self._finished_t = Thread(target=self._signal_handler)
-            self._signal_t = Thread(target=self._internal_signal_handler)
-            self._gc_t = Thread(target=self._gc)
-            self._wd_t = Thread(target=self._notify_watchdog)
+            self._waiting: List[Petition] = []
+            self._waiting_cv = Condition()
+            self._waiting_pending = 0
+            self._action_pool = None
+            if properties.action_executor == "process":
+                # workers are not forked, as the processor threads may be holding locks by
+                # then. The queue must be created on the same context for sharing it with them
+                self._mp_context = multiprocessing.get_context("forkserver")
+                self._pid_queue = self._mp_context.Queue()
+                self._action_pool = self._new_action_pool()
+                self._remote_lock = Lock()
+                self._remote_petitions: Set[Union[int, str]] = set()
+                self._pid_t = Thread(target=self._pid_handler, daemon=True)
+                self._pid_t.start()
+            self._process_t = Thread(target=self._process, daemon=True)
+            self._internal_t = Thread(target=self._internal_process, daemon=True)
+            self._finished_t = Thread(target=self._signal_handler, daemon=True)
+            self._waiting_t = Thread(target=self._waiting_handler, daemon=True)
+            self._wd_t = Thread(target=self._notify_watchdog, daemon=True)
             self._process_t.start()
             self._internal_t.start()
             self._finished_t.start()
-            self._signal_t.start()
-            self._gc_t.start()
+            self._waiting_t.start()
             if self.notify_watchdog:
                 self._wd_t.start()
             self.__must_init__ = False
 
     @property
     def running(self) -> bool:
-        """Whether if the current processor is running or not"""
-        return self._running
+        """Whether if the current processor is running or not
 
-    @running.setter
-    def running(self, v: bool):
-        with self.lock:
-            self._running = v
+        .. versionchanged:: 0.1.12
+            The property is now read-only. Call :func:`shutdown` for stopping the processor.
+        """
+        return not self._stop.is_set()
 
     def exists(self, m: Union[Message, int, str]) -> bool:
         """
@@ -306,20 +365,58 @@ class Processor:
         log.debug("received petition for finish message with ID %s", m)
         self.finishq.put(m)
 
+    def _internalq_put(self, p: Petition):
+        with self._internalq_cv:
+            heapq.heappush(self._internalq_heap, p)
+            self._internalq_cv.notify()
+
+    def _internalq_get(self) -> Petition:
+        # petitions are only popped once there is a free worker for running them, so the
+        # heap (and not the FIFO queue of the pool) decides which one runs next. The slot
+        # is released when the petition finishes, see _release_slot
+        with self._internalq_cv:
+            while True:
+                heap = self._internalq_heap
+                if heap and (
+                    isinstance(heap[0], (EmptyPetition, WatchdogPetition))
+                    or self._slots.acquire(blocking=False)
+                ):
+                    return heapq.heappop(heap)
+
+                if self._stop.is_set():
+                    # woken up by shutdown with nothing left to process
+                    return EmptyPetition()
+                self._internalq_cv.wait()
+
+    def _release_slot(self, p: Petition, fut: Future):
+        with self._internalq_cv:
+            self._slots.release()
+            self._internalq_cv.notify()
+
+        e = fut.exception()
+        if e is not None:
+            log.warning(
+                'unhandled exception while handling petition "%s" -> "%s"', p, e, exc_info=e
+            )
+
     def _process(self):
         log.debug("fixing internal digest key")
         multiprocessing.current_process().authkey = properties.authkey
 
+        # bind the callables used on every message just once
+        convert = self.manager.convert_to_petition
+        exists = self.exists
+        put_internal = self._internalq_put
         try:
-            while self.running:
+            while not self._stop.is_set():
                 log.debug("waiting for message...")
                 m = self.queue.get()
                 if m is not None:
                     log.debug('converting message "%s" into a petition', m)
-                    p: Optional[Petition] = self.manager.convert_to_petition(m)
+                    p: Optional[Petition] = convert(m)
                     if p is not None:
                         log.debug("> %s", p)
-                        if self.exists(p.id):
+                        if exists(p.id):
                             log.warning("received message (%s) already exists", p)
                             p.queue.put(f'message with ID "{p.id}" already exists\n')
                             p.queue.put(1)
@@ -329,50 +426,40 @@ class Processor:
                         continue
                 else:
                     p = EmptyPetition()
-                self._internalq.put(p)
+                put_internal(p)
         except Exception as e:
             log.fatal("unhandled exception: %s", e)
-            self.running = False
+            self._stop.set()
             if self.notify_watchdog:
                 systemd.notify(f"STATUS=Failure due to unexpected exception - {e}")
                 systemd.notify("WATCHDOG=trigger")
 
     def _internal_process(self):
         try:
-            while self.running:
+            while not self._stop.is_set():
                 log.debug("waiting for internal petition...")
-                empty = False
-                items_to_enqueue = []
                 log.debug("looking ahead %d items", self.look_ahead)
                 for i in range(1, self.look_ahead + 1):
-                    p: Petition = self._internalq.get()
+                    p: Petition = self._internalq_get()
                     if not isinstance(p, (EmptyPetition, WatchdogPetition)):
-                        log.debug('adding petition "%s" to list of possible petitions', p)
-                        items_to_enqueue.append(p)
+                        # submitted right away, as it already holds a worker slot
+                        log.debug('submitting petition "%s"', p)
+                        fut = self._pool.submit(self._start, p)
+                        fut.add_done_callback(partial(self._release_slot, p))
                     elif isinstance(p, EmptyPetition):
                         log.debug("received empty petition")
-                        empty = True
                         break
                     elif self.notify_watchdog and isinstance(p, WatchdogPetition):
                         log.debug("received watchdog request [WD is enabled for this instance]")
                         systemd.notify("WATCHDOG=1")
 
-                    if i > self._internalq.qsize():
+                    if i > len(self._internalq_heap):
                         break
-
-                for item in items_to_enqueue:
-                    log.debug('creating thread for petition "%s"', item)
-                    launch_t = Thread(target=self._start, args=(item,))
-                    launch_t.start()
-                    self._threads.append(launch_t)
-
-                if not empty:
-                    sleep(random.uniform(0.5, 5))
             log.debug("internal process handler finished")
 
         except Exception as e:
             log.fatal("unhandled exception: %s", e)
-            self.running = False
+            self._stop.set()
             if self.notify_watchdog:
                 systemd.notify(f"STATUS=Failure due to unexpected exception - {e}")
                 systemd.notify("WATCHDOG=trigger")
@@ -386,89 +473,187 @@ class Processor:
             self._petitions[p.id] = pid
 
         with self._pred_lock:
-            if not p.condition(p):
-                log.debug('petition "%s" did not satisfy the condition, re-adding to queue', p)
-                self._internalq.put(p)
-                self._gc_event.set()
+            try:
+                satisfied = p.condition(p)
+                if satisfied:
+                    log.debug('petition "%s" satisfied condition', p)
+                    self.manager.on_start(p)
+            except Exception as e:
+                log.warning(
+                    'unhandled exception while starting petition "%s" -> "%s"', p, e, exc_info=True
+                )
+                self._discard(p, e)
                 return
 
-            log.debug('petition "%s" satisfied condition', p)
-            self.manager.on_start(p)
+            if not satisfied:
+                log.debug('petition "%s" did not satisfy the condition, waiting...', p)
+                self._waiting.append(p)
+                return
 
         try:
-            p.action(assign_pid, p)
+            if self._action_pool is None:
+                p.action(assign_pid, p)
+            else:
+                with self._remote_lock:
+                    self._remote_petitions.add(p.id)
+                self._run_remote(p)
         except Exception as e:
             log.warning(
                 'unhandled exception while running petition "%s" -> "%s"', p, e, exc_info=True
             )
         finally:
             log.debug('petition "%s" finished, triggering callbacks', p)
+            if self._action_pool is not None:
+                with self._remote_lock:
+                    self._remote_petitions.discard(p.id)
             self._petitions.pop(p.id, None)
-            self._gc_event.set()
 
             with self._pred_lock:
                 self.manager.on_finish(p)
+            self._notify_waiting()
+
+    def _run_remote(self, p: Petition):
+        # the condition is only evaluated here, so it is not required to be picklable
+        remote = copy.copy(p)
+        remote.condition = None
+        pool = self._action_pool
+        try:
+            try:
+                future = pool.submit(_run_action, remote)
+            except BrokenProcessPool:
+                # the pool broke before the petition was sent to it, so it can be retried
+                pool = self._restart_action_pool(pool)
+                future = pool.submit(_run_action, remote)
+            future.result()
+        except BrokenProcessPool as e:
+            # a worker died abruptly (i.e.: os._exit, a crash or the OOM killer), so
+            # neither this petition nor the pool can be used anymore
+            log.error('action pool broken while running petition "%s" -> "%s"', p, e)
+            self._restart_action_pool(pool)
+            self._discard(p, e)
+
+    def _new_action_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=os.cpu_count(),
+            mp_context=self._mp_context,
+            initializer=_init_action_worker,
+            initargs=(self._pid_queue, properties.authkey),
+        )
+
+    def _restart_action_pool(self, broken: ProcessPoolExecutor) -> ProcessPoolExecutor:
+        with self._remote_lock:
+            # any other petition running on the broken pool may have already restarted it
+            if self._action_pool is not broken:
+                return self._action_pool
+            log.warning("restarting the action pool")
+            pool = self._action_pool = self._new_action_pool()
+        broken.shutdown(wait=False)
+        return pool
 
     def _signal_handler(self):
         log.debug("fixing internal digest key")
         multiprocessing.current_process().authkey = properties.authkey
 
+        get_pid = self._petitions.get
         try:
-            while self.running:
+            while not self._stop.is_set():
                 log.debug("waiting for finish message...")
                 m = self.finishq.get()
-                self._signals.put(m)
-        except Exception as e:
-            log.fatal("unhandled exception: %s", e)
-            self.running = False
-            if self.notify_watchdog:
-                systemd.notify(f"STATUS=Failure due to unexpected exception - {e}")
-                systemd.notify("WATCHDOG=trigger")
-
-    def _internal_signal_handler(self):
-        try:
-            while self.running:
-                log.debug("waiting for internal signal...")
-                m = self._signals.get()
                 if isinstance(m, Message):
                     m = m.id
 
                 if m is not None:
                     log.debug('received signal petition for message with ID "%s"', m)
-                    if m not in self._petitions:
+                    # the petition may finish at any time, so look it up just once
+                    pid = get_pid(m)
+                    if pid is None:
                         log.warning('message with ID "%s" not found or not running!', m)
                         continue
 
-                    pid = self._petitions[m]
                     kill_proc_tree(pid, including_parent=False, sig=signal.SIGINT)
                     log.debug('sent signal to process "%d" and all of its children', pid)
         except Exception as e:
             log.fatal("unhandled exception: %s", e)
-            self.running = False
+            self._stop.set()
+            if self.notify_watchdog:
+                systemd.notify(f"STATUS=Failure due to unexpected exception - {e}")
+                systemd.notify("WATCHDOG=trigger")
+
+    def _pid_handler(self):
+        try:
+            for pid_id, pid in iter(self._pid_queue.get, None):
+                log.debug('assigning pid "%s" to remote petition "%s"', pid, pid_id)
+                # the petition may have already finished, do not leave stale PIDs behind
+                with self._remote_lock:
+                    if pid_id in self._remote_petitions:
+                        self._petitions[pid_id] = pid
+        except Exception as e:
+            log.fatal("unhandled exception: %s", e)
+            self._stop.set()
             if self.notify_watchdog:
                 systemd.notify(f"STATUS=Failure due to unexpected exception - {e}")
                 systemd.notify("WATCHDOG=trigger")
 
-    def _gc(self):
+    def _notify_waiting(self):
+        with self._waiting_cv:
+            self._waiting_pending += 1
+            self._waiting_cv.notify()
+
+    @staticmethod
+    def _discard(p: Petition, e: Exception):
+        # lets the source process know the petition will never be run
+        try:
+            p.communicate(f'petition with ID "{p.id}" failed: {e}\n')
+            p.finish(1)
+        except Exception as qe:
+            log.warning('could not notify the end of petition "%s" -> "%s"', p, qe)
+
+    def _waiting_handler(self):
         try:
-            while self.running:
-                self._gc_event.wait()
-                self._gc_event.clear()
-                for thread in self._threads:
-                    if not thread.is_alive():
-                        log.debug('pruning thread "%s"', thread)
-                        self._threads.remove(thread)
+            while not self._stop.is_set():
+                # conditions may also depend on external resources, so re-check them
+                # periodically even if no petition has finished
+                with self._waiting_cv:
+                    self._waiting_cv.wait_for(
+                        lambda: self._waiting_pending or self._stop.is_set(), timeout=1
+                    )
+                    self._waiting_pending = 0
+
+                with self._pred_lock:
+                    if not self._waiting:
+                        continue
+
+                    still_waiting = []
+                    for p in self._waiting:
+                        try:
+                            satisfied = p.condition(p)
+                        except Exception as e:
+                            log.warning(
+                                'unhandled exception while evaluating condition of "%s" -> "%s"',
+                                p,
+                                e,
+                                exc_info=True,
+                            )
+                            self._discard(p, e)
+                            continue
+
+                        if satisfied:
+                            log.debug('petition "%s" now satisfies its condition, re-adding', p)
+                            self._internalq_put(p)
+                        else:
+                            still_waiting.append(p)
+                    self._waiting = still_waiting
         except Exception as e:
             log.fatal("unhandled exception: %s", e)
-            self.running = False
+            self._stop.set()
             if self.notify_watchdog:
                 systemd.notify(f"STATUS=Failure due to unexpected exception - {e}")
                 systemd.notify("WATCHDOG=trigger")
 
     def _notify_watchdog(self):
-        while self.running and self.notify_watchdog:
-            self._internalq.put(WatchdogPetition())
-            sleep(5)
+        while self.notify_watchdog and not self._stop.is_set():
+            self._internalq_put(WatchdogPetition())
+            self._stop.wait(5)
 
     def shutdown(self):
         """
@@ -479,10 +664,12 @@ class Processor:
         """
         try:
             log.info("finishing processor")
-            self.running = False
+            self._stop.set()
             self.queue.put(None)
             self.finishq.put(None)
-            self._gc_event.set()
+            self._notify_waiting()
+            with self._internalq_cv:
+                self._internalq_cv.notify_all()
 
             log.info("waiting for pending processes...")
             self._process_t.join()
@@ -490,14 +677,18 @@ class Processor:
 
             log.info("waiting for pending signals...")
             self._finished_t.join()
-            self._signal_t.join()
 
-            log.info("waiting for garbage collector...")
-            self._gc_t.join()
+            log.info("waiting for condition handler...")
+            self._waiting_t.join()
+            if self._waiting:
+                log.warning("%d petitions were still waiting to be run", len(self._waiting))
 
             log.info("waiting for pending operations...")
-            for thread in self._threads:
-                thread.join()
+            self._pool.shutdown(wait=True)
+            if self._action_pool is not None:
+                self._action_pool.shutdown(wait=True)
+                self._pid_queue.put(None)
+                self._pid_t.join()
 
             log.info("finished")
         except Exception as e:
@@ -21,12 +21,14 @@
 #                                    SOFTWARE.
 """
 When working with an Orcha project, properties are expected to be stored here. This module
-serves as a global entry point in which execution settings are stored. There are four
+serves as a global entry point in which execution settings are stored. There are six
 attributes exposed:
 
  + :attr:`listen_address`
  + :attr:`port`
  + :attr:`authkey`
+ + :attr:`max_concurrent`
+ + :attr:`action_executor`
  + :attr:`extras`
 
 One can either opt in for manually defining these attributes or leverage them
@@ -67,6 +69,33 @@ from the current process.
            + :py:func:`current_process <multiprocessing.current_process>`
 """
 
+max_concurrent: Optional[int] = None
+"""
+Maximum amount of petitions that the :class:`Processor <orcha.lib.Processor>` will run at
+the same time. Petitions that are received when that limit is reached will wait until any
+of the running ones finishes. It must be set before the processor is created, and defaults
+to ``32`` when unset.
+
+.. versionadded:: 0.1.12
+"""
+
+action_executor: str = "thread"
+"""
+Defines where the :class:`Processor <orcha.lib.Processor>` runs the
+:attr:`action <orcha.interfaces.Petition.action>` of the petitions. It can be either:
+
+ + ``"thread"`` (default): actions are run on the processor's own thread pool.
+ + ``"process"``: actions are run on a pool of processes (one per CPU), so CPU-bound
+   actions are not limited by the GIL. Petitions are sent to those processes, so they
+   must be picklable (see :class:`Petition <orcha.interfaces.Petition>`). Processes are
+   started with the ``forkserver`` method, so the entry point of your service must be
+   guarded by ``if __name__ == "__main__"``.
+
+It must be set before the processor is created.
+
+.. versionadded:: 0.1.12
+"""
+
 extras = {}
 """
 Extra properties that you may want to store when working with the project. By default, all
@@ -84,8 +113,10 @@ In addition, this field is open for adding new arguments that you may need.
 
 
 __all__ = [
+    "action_executor",
     "authkey",
     "extras",
+    "max_concurrent",
     "port",
     "listen_address",
 ]
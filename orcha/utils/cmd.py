@@ -20,17 +20,81 @@
 #  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 #                                    SOFTWARE.
 """Command line utilities that can be used by subprojects or plugins"""
+import codecs
+import io
+import os
 import shlex
 import signal
 import subprocess
-from typing import Any, Callable, Collection, Optional, Union
-
-import psutil
+from functools import lru_cache
+from typing import Any, Callable, Collection, List, Optional, Tuple, Union
 
 from .logging_utils import get_logger
 
 log = get_logger()
 
+_READ_SIZE = 65536
+
+
+def _noop(_):
+    return None
+
+
+@lru_cache(maxsize=256)
+def _split(cmd: str) -> Tuple[str, ...]:
+    return tuple(shlex.split(cmd))
+
+
+class _LineSplitter:
+    """Incrementally decodes raw output chunks into UTF-8 lines, translating universal
+    newlines just like text-mode pipes do, so multi-byte characters and ``\r\n`` pairs
+    can be safely split across chunks.
+    """
+
+    __slots__ = ("_decoder", "_pending")
+
+    def __init__(self):
+        self._decoder = io.IncrementalNewlineDecoder(
+            codecs.getincrementaldecoder("utf-8")(errors="replace"), translate=True
+        )
+        # fragments of the current line, only joined once the line is complete so long
+        # lines are not copied over and over again
+        self._pending: List[str] = []
+
+    def feed(self, chunk: bytes) -> List[str]:
+        """Decodes the given chunk, returning the lines that have been completed"""
+        data = self._decoder.decode(chunk)
+        if "\n" not in data:
+            if data:
+                self._pending.append(data)
+            return []
+
+        lines = data.split("\n")
+        self._pending.append(lines[0])
+        lines[0] = "".join(self._pending)
+        last = lines.pop()
+        self._pending = [last] if last else []
+        return [f"{line}\n" for line in lines]
+
+    def flush(self) -> List[str]:
+        """Returns any pending output once the stream is closed"""
+        self._pending.append(self._decoder.decode(b"", final=True))
+        pending = "".join(self._pending)
+        self._pending = []
+        return [pending] if pending else []
+
+
+def _read_output(fd: int, on_output: Callable[[str], Any]):
+    splitter = _LineSplitter()
+    chunk = os.read(fd, _READ_SIZE)
+    while chunk:
+        for line in splitter.feed(chunk):
+            on_output(line)
+        chunk = os.read(fd, _READ_SIZE)
+
+    for line in splitter.flush():
+        on_output(line)
+
 
 def run_command(
     cmd: Union[str, Collection[str]],
@@ -55,7 +119,9 @@ def run_command(
     Args:
         cmd (:obj:`str` | :class:`Collection <collections.abc.Collection>`): the command to run.
             Can be a :obj:`str` or an iterable. If a :obj:`str` is given
-            then :func:`shlex.split` is called for dividing the command.
+            then :func:`shlex.split` is called for dividing the command. The result of
+            the split is cached for the latest commands, so prefer passing an iterable
+            for commands that are run just once.
         on_start (Callable[[subprocess.Popen], Any]): function to be run when the process has
             just started. Defaults to :obj:`None`.
         on_output (Callable[[str], Any]): function to be called when the process outputs a line.
@@ -68,19 +134,11 @@ def run_command(
         int: command return code
     """
 
-    def empty(_):
-        pass
-
-    if on_start is None:
-        on_start = empty
-
-    if on_output is None:
-        on_output = empty
+    on_start = on_start or _noop
+    on_output = on_output or _noop
+    on_finish = on_finish or _noop
 
-    if on_finish is None:
-        on_finish = empty
-
-    command = shlex.split(cmd) if isinstance(cmd, str) else cmd
+    command = _split(cmd) if isinstance(cmd, str) else cmd
     log.debug("$ %s", cmd)
     log.debug("> %s", command)
 
@@ -89,14 +147,11 @@ def run_command(
         stdout=subprocess.PIPE,
         stderr=subprocess.STDOUT,
         stdin=subprocess.DEVNULL,
-        universal_newlines=True,
-        bufsize=1,
         cwd=cwd,
         start_new_session=True,
     ) as proc:
         on_start(proc)
-        for line in proc.stdout:
-            on_output(line)
+        _read_output(proc.stdout.fileno(), on_output)
 
         ret = proc.wait()
     on_finish(ret)
@@ -108,11 +163,29 @@ def kill_proc_tree(pid: int, including_parent: bool = True, sig: int = signal.SI
     Attempts to kill the given PID and all of its children by sending the given
     signal, if sufficient permissions.
 
+    .. versionchanged:: 0.1.12
+        When the parent is included and it is the leader of its own process group (i.e.:
+        it was started by :func:`run_command`), the signal is sent to the entire group at
+        once with :func:`os.killpg`. Otherwise, the process tree is walked using
+        :mod:`psutil`.
+
     Args:
         pid (int): the PID to kill alongside with its children.
         including_parent (bool): whether to kill also the PID itself. Defaults to :obj:`True`.
         sig (int): the signal to send to the processes. Defaults to :attr:`signal.SIGTERM`.
     """
+    if including_parent:
+        try:
+            if os.getpgid(pid) == pid:
+                os.killpg(pid, sig)
+                return
+        except ProcessLookupError:
+            log.warning("error while trying to kill proccess with id %s", pid)
+            return
+
+    # psutil is only required when the process tree must be walked
+    import psutil
+
     try:
         parent = psutil.Process(pid)
         for child in parent.children(recursive=True):